@@ -13,14 +13,18 @@ The monoqueue data structure with core business logic.
 
 import configparser
 import datetime
-import json
+import hashlib
+import heapq
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Dict, Optional, List
 
+from . import _json
 from . import discourse, firefox, github
 from . import time
 from .log import log
-from .parse import evaluate
+from .parse import compile_expr, names
 
 HANDLERS = {
     "discourse": discourse.update,
@@ -28,13 +32,70 @@ HANDLERS = {
     "github": github.update,
 }
 
+# Score modification operators. Subtraction and division clamp at 1,
+# so that penalties can never drive a score to zero or below.
+_OPS = {
+    "+": lambda score, value: score + value,
+    "-": lambda score, value: max(1, score - value),
+    "x": lambda score, value: score * value,
+    "/": lambda score, value: max(1, score / value),
+}
+
 
 class ImpactScore:
+    # One instance per action item per scoring pass; slots keep the
+    # records small and the attribute loads cheap.
+    __slots__ = ("value", "rules")
+
     def __init__(self, value, rules):
         self.value = value
         self.rules = rules
 
 
+class Rule:
+    """
+    A scoring rule, parsed from the config's [rules] section.
+
+    Consequences are of the form:
+
+        +3: next-release milestone
+        ^^  ^
+        ||  \\-- description
+        |\\----- score modification value
+        \\------ operator (+, -, x, or /)
+
+    So in the above example, the score should increase by 3.
+
+    If the score modification value is X instead of a number,
+    it is expected the rule application will return the number.
+    For example:
+
+        issue/comments -> +X: number of comments
+
+    The above rule should increase the score by the comment count.
+    """
+
+    def __init__(self, expression: str, consequence: str):
+        self.expression = expression
+        # Compile the expression once up front, rather than reprocessing
+        # it for every action item the rule is applied against.
+        self.evaluate = compile_expr(expression)
+        # Fields the expression needs; items lacking all of them can be
+        # skipped without evaluating. Empty means no such shortcut.
+        self.fields = names(expression)
+        self.consequence = consequence
+        # Rules over the seconds_since_* fields change value as the
+        # clock ticks, so their results cannot be memoized.
+        self.time_sensitive = "seconds_since" in expression
+        self.op = consequence[0]
+        self.apply = _OPS.get(self.op)
+        if self.apply is None:
+            raise ValueError(f"Invalid rule consequence: {consequence}")
+        smv = consequence[1:consequence.index(":")]
+        self.is_x = smv == "X"
+        self.smv = None if self.is_x else float(smv)
+
+
 class Monoqueue:
     _DEFAULT_CONFIG_PATH = Path("~/.config/monoqueue.conf").expanduser()
     _DEFAULT_ITEMS_PATH = Path("~/.local/share/monoqueue/items.json").expanduser()
@@ -45,21 +106,30 @@ class Monoqueue:
             config = configparser.ConfigParser()
             config.read(Monoqueue._DEFAULT_CONFIG_PATH)
         self.config = config
+        # Snapshot source sections into plain dicts, so that update()
+        # avoids ConfigParser's interpolating proxy access per lookup.
+        self._sections = {
+            section: dict(options)
+            for section, options in config.items()
+            if section not in ("DEFAULT", "rules", "scoring")
+        }
         self.items = {}
         self._impact = {}
         self._metadata = {}
+        self._eval_cache = {}
+        self._active_urls = None
+        self._active_expiry = None
+        self._rule_hits = []
         self.progress = None
 
         # load rules from config
         self.rules = []
         for k, v in config["rules"].items():
             if not k.startswith("rule"): continue
-            arrow = v.find("->")
+            expression, arrow, consequence = v.partition("->")
             if not arrow:
                 raise ValueError(f"Invalid rule: {v}")
-            expression = v[:arrow].strip()
-            consequence = v[arrow + 2:].strip()
-            self.rules.append((expression, consequence))
+            self.rules.append(Rule(expression.strip(), consequence.strip()))
         log.debug("Parsed %d rules", len(self.rules))
 
     def load(self,
@@ -68,27 +138,93 @@ class Monoqueue:
     ) -> None:
         self.items = self._load(items_path)
         self._metadata = self._load(metadata_path)
-        if self.items: self._score()
+        self._active_urls = None
+        cache = self._metadata.pop("__impact__", None)
+        if not self.items: return
+        if (
+            cache is not None
+            and not any(rule.time_sensitive for rule in self.rules)
+            and cache.get("signature") == self._signature()
+        ):
+            # Neither items nor rules changed since the cached scores
+            # were computed, and no rule depends on the clock, so the
+            # scores still hold; skip the full scoring pass.
+            self._impact = {
+                url: ImpactScore(value, rules)
+                for url, (value, rules) in cache["scores"].items()
+            }
+        else:
+            self._score()
 
     def save(self,
         items_path: Optional[Path] = _DEFAULT_ITEMS_PATH,
         metadata_path: Optional[Path] = _DEFAULT_METADATA_PATH
     ) -> None:
         self._save(self.items, items_path)
-        self._save(self._metadata, metadata_path)
+        metadata = self._metadata
+        if self._impact and not any(rule.time_sensitive for rule in self.rules):
+            # Persist computed scores so the next load can skip scoring.
+            metadata = dict(metadata)
+            metadata["__impact__"] = {
+                "signature": self._signature(),
+                "scores": {
+                    url: [score.value, score.rules]
+                    for url, score in self._impact.items()
+                },
+            }
+        self._save(metadata, metadata_path)
 
     def urls(self, active_only=True) -> List[str]:
         """
         Get the list of action item URLs, ordered by impact score.
         """
-        urls = []
-        urls.extend(
-            (url for url in self.items if self.active(url))
-            if active_only
-            else self.items
-        )
-        urls.sort(key=lambda url: self.impact(url).value, reverse=True)
-        return urls
+        scored = [
+            (self._impact[url].value, url)
+            for url in self._candidates(active_only)
+        ]
+        # NB: Keying on the score alone keeps the sort stable for ties
+        # (plain tuple comparison would fall through to the URLs).
+        scored.sort(key=itemgetter(0), reverse=True)
+        return [url for _, url in scored]
+
+    def top_urls(self, n: int, active_only=True) -> List[str]:
+        """
+        Get the n action item URLs with the highest impact scores.
+
+        Cheaper than urls() when only a few items are needed:
+        heap selection rather than a full sort.
+        """
+        top = heapq.nlargest(n, (
+            (self._impact[url].value, url)
+            for url in self._candidates(active_only)
+        ), key=itemgetter(0))
+        return [url for _, url in top]
+
+    def _candidates(self, active_only: bool):
+        if not active_only: return self.items
+        now = time.now()
+        if self._active_urls is None or (
+            # Activeness is time-dependent: rebuild once the earliest
+            # pending deferral expires, so long-running sessions see
+            # items resurface without an explicit invalidation.
+            self._active_expiry is not None and now >= self._active_expiry
+        ):
+            # NB: A list in items order, not a set -- score ties are
+            # common (every rule-less item scores 1), and the stable
+            # sort in urls() preserves whatever order we supply here.
+            active = []
+            expiry = None
+            for url in self.items:
+                if self.active(url, now):
+                    active.append(url)
+                    continue
+                metadata = self._metadata.get(url)
+                if metadata and "deferred_until" in metadata:
+                    until = time.str2dt(metadata["deferred_until"])
+                    if expiry is None or until < expiry: expiry = until
+            self._active_urls = active
+            self._active_expiry = expiry
+        return self._active_urls
 
     def update(self) -> None:
         """
@@ -97,24 +233,37 @@ class Monoqueue:
         :raise RuntimeError: If something goes wrong.
         """
 
-        for section, config in self.config.items():
-            if section in ("DEFAULT", "rules", "scoring"): continue
-
+        sources = []
+        for section, config in self._sections.items():
             config["source"] = section
             handler = config.get("handler", section)
 
-            log.info("Updating %s...", section)
-
             if handler not in HANDLERS:
-                raise f"Unsupported source type: {handler}"
-
-            # Execute the handler's update function.
-            update = HANDLERS[handler]
-            if update is not None: update(self, config)
-
-            log.debug("Action item count -> %d", len(self.items))
+                raise RuntimeError(f"Unsupported source type: {handler}")
+
+            sources.append((section, HANDLERS[handler], config))
+
+        # Sources are I/O bound, so update them concurrently; each
+        # handler returns its own items dict, merged here afterward.
+        if sources:
+            with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+                futures = {}
+                for section, update, config in sources:
+                    log.info("Updating %s...", section)
+                    futures[pool.submit(update, self, config)] = section
+                for future in as_completed(futures):
+                    # Merge per item, not per dict: a URL fed by two
+                    # sources (e.g. a bookmarked GitHub issue) keeps
+                    # the fields contributed by each.
+                    for url, info in future.result().items():
+                        self.items.setdefault(url, {}).update(info)
+                    log.debug(
+                        "%s done; action item count -> %d",
+                        futures[future], len(self.items)
+                    )
 
         # Recalculate item scores.
+        self._active_urls = None
         self._score()
 
     def item(self, url: str) -> Optional[Dict[str, Any]]:
@@ -158,23 +307,29 @@ class Monoqueue:
         metadata = self.metadata(url)
         metadata["deferred_at"] = time.string(time.now())
         metadata["deferred_until"] = time.string(until)
+        self._active_urls = None
 
-    def active(self, url: str) -> bool:
+    def active(self, url: str, now: Optional[datetime.datetime] = None) -> bool:
         """
         Get whether the given URL's action item is currently active.
         If it was previously deferred until later, and the deferral
         time has not yet come to pass, then the URL will be inactive.
         :param url:
             The action item URL to check if active.
+        :param now:
+            Optional precomputed current time, so that batch callers
+            can avoid resolving the clock once per URL.
         :return:
             True if the action item is currently active, False if not.
         """
-        if url not in self.items: return False
-        metadata = self.metadata(url)
-        if metadata is None or "deferred_until" not in metadata: return True
-
-        item = self.item(url)
-        if "deferred_at" in metadata and "updated" in metadata:
+        item = self.items.get(url)
+        if item is None: return False
+        # NB: Read _metadata directly; metadata(url) would create and
+        # store an empty entry for every URL merely being checked.
+        metadata = self._metadata.get(url)
+        if not metadata or "deferred_until" not in metadata: return True
+
+        if "deferred_at" in metadata and "updated" in item:
             # Check whether item has changed since deferral occurred.
             deferred_at = time.str2dt(metadata["deferred_at"])
             updated = time.str2dt(item["updated"])
@@ -182,7 +337,8 @@ class Monoqueue:
 
         # Check whether the deferral time has already passed.
         deferred_until = time.str2dt(metadata["deferred_until"])
-        return time.now() >= deferred_until
+        if now is None: now = time.now()
+        return now >= deferred_until
 
     def impact(self, url: str) -> ImpactScore:
         """
@@ -194,6 +350,20 @@ class Monoqueue:
         """
         return self._impact.get(url)
 
+    def _signature(self) -> str:
+        """
+        Digest of the current items and rules, identifying the inputs
+        from which the impact scores were computed.
+        """
+        sig = hashlib.blake2b(digest_size=8)
+        for url in sorted(self.items):
+            sig.update(url.encode())
+            sig.update(str(self.items[url].get("updated")).encode())
+        for rule in self.rules:
+            sig.update(rule.expression.encode())
+            sig.update(rule.consequence.encode())
+        return sig.hexdigest()
+
     @staticmethod
     def _load(path: Path) -> Dict[str, Any]:
         log.debug("Loading %s...", path)
@@ -201,8 +371,18 @@ class Monoqueue:
         if path is None or not path.exists():
             log.debug("No existing items at %s", path)
             return {}
-        with open(path) as f:
-            return json.load(f)
+        if path.stat().st_size > 50_000_000:
+            # Very large data files are streamed entry by entry when
+            # ijson is available, to avoid buffering the whole file
+            # in memory on top of the parsed result.
+            try:
+                import ijson
+            except ImportError:
+                pass
+            else:
+                with open(path, "rb") as f:
+                    return dict(ijson.kvitems(f, ""))
+        return _json.loads(path.read_bytes())
 
     @staticmethod
     def _save(data: Dict[str, Any], path: Path) -> None:
@@ -210,79 +390,102 @@ class Monoqueue:
 
         if data is None or path is None: return
         path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
+        path.write_bytes(_json.dumps(data, indent=True))
 
-    def _score(self):
+    def _score(self, track_rules: bool = True):
         log.debug("Scoring action items...")
 
-        # Compute time-sensitive age fields.
+        # Compute time-sensitive age fields. Ages computed less than a
+        # minute ago are close enough; skip recomputing them, so that
+        # repeated scoring passes don't re-parse every timestamp. The
+        # stamp records the source timestamps alongside the clock, so
+        # an item whose created/updated changed (e.g. freshly merged by
+        # update()) is always recomputed, however recent the stamp.
+        now = time.now()
+        now_ts = now.timestamp()
         for item in self.items.values():
-            if "created" in item:
-                created_age = time.age(item["created"])
+            created = item.get("created")
+            updated = item.get("updated")
+            stamp = item.get("_age_stamp")
+            if (
+                isinstance(stamp, list)
+                and now_ts - stamp[0] < 60
+                and stamp[1:] == [created, updated]
+            ): continue
+            if created is not None:
+                created_age = now - time.str2dt(created)
                 item["seconds_since_creation"] = created_age.total_seconds()
-            if "updated" in item:
-                updated_age = time.age(item["updated"])
+            if updated is not None:
+                updated_age = now - time.str2dt(updated)
                 item["seconds_since_update"] = updated_age.total_seconds()
+            item["_age_stamp"] = [now_ts, created, updated]
 
-        # Initially, each rule has not applied to any action items.
-        unused_rules = set(consequence for _, consequence in self.rules)
+        # Count how many action items each rule applies to.
+        hits = [0] * len(self.rules)
 
         self._impact.clear()
-        for url, info in self.items.items():
-            score_value = 1
-            score_rules = []
-            for expression, consequence in self.rules:
+        for url in self.items:
+            self._impact[url] = ImpactScore(1, [])
+
+        # Apply rules column-wise: for each rule, sweep all action items.
+        # Per-item rule order is preserved, but the per-rule constants
+        # (operator, score mod value, expression tree) are now hoisted
+        # out of the inner loop over items, and the shared dicts are
+        # bound to locals to keep the inner loop tight.
+        items = self.items.items()
+        eval_cache = self._eval_cache
+        impacts = self._impact
+        for i, rule in enumerate(self.rules):
+            rule_evaluate = rule.evaluate
+            op = rule.op
+            apply = rule.apply
+            time_sensitive = rule.time_sensitive
+            is_x = rule.is_x
+            rule_smv = rule.smv
+            rule_consequence = rule.consequence
+            fields = rule.fields
+            for url, info in items:
+                # Items without any of the rule's fields cannot match.
+                if fields and not any(f in info for f in fields):
+                    continue
                 # Try to apply the rule to this action item.
-                applies = evaluate(expression, info)
+                if time_sensitive:
+                    applies = rule_evaluate(info)
+                else:
+                    # Reuse the previous result unless the item changed.
+                    updated = info.get("updated")
+                    cached = eval_cache.get((i, url))
+                    if cached is not None and cached[0] == updated:
+                        applies = cached[1]
+                    else:
+                        applies = rule_evaluate(info)
+                        eval_cache[i, url] = (updated, applies)
                 if not applies: continue  # Rule does not apply.
 
                 # The rule applies. Mark it as used.
-                if consequence in unused_rules: unused_rules.remove(consequence)
-
-                # Consequences are of the form:
-                #
-                #   +3: next-release milestone
-                #   ^^  ^
-                #   ||  \-- description
-                #   |\----- score modification value
-                #   \------ operator (+, -, x, or /)
-                #
-                # So in the above example, the score should increase by 3.
-                #
-                # If the score modification value is X instead of a number,
-                # it is expected the rule application will return the number.
-                # For example:
-                #
-                #   issue/comments -> +X: number of comments
-                #
-                # The above rule should increase the score by the comment count.
-
-                op = consequence[0]
-                smv = consequence[1:consequence.index(":")]
-
-                if smv == "X":
+                hits[i] += 1
+
+                consequence = rule_consequence
+                if is_x:
                     # Score mod value is the rule evaluation result.
                     smv = float(applies)
-                    # Replace X with the actual number.
-                    consequence = f"{op}{applies}{consequence[2:]}"
+                    if track_rules:
+                        # Replace X with the actual number.
+                        consequence = f"{op}{applies}{consequence[2:]}"
                 else:
                     # Score mod value is a constant declared in the consequence.
-                    smv = float(smv)
+                    smv = rule_smv
 
                 # Now change the score using the operator and score modification value.
-                if op == '+': score_value += smv
-                elif op == '-': score_value = max(1, score_value - smv)
-                elif op == 'x': score_value *= smv
-                elif op == '/': score_value = max(1, score_value / smv)
-                else: raise RuntimeError(f"Invalid rule consequence: {consequence}")
+                score = impacts[url]
+                score.value = apply(score.value, smv)
 
                 # Record the consequence on this item's list of applied rules.
-                score_rules.append(consequence)
-
-            self._impact[url] = ImpactScore(score_value, score_rules)
-
-        # Warn about rules that never applied to an action item.
-        for _, consequence in self.rules:
-            if consequence in unused_rules:
-                log.debug(f"Irrelevant rule: %s", consequence)
+                if track_rules: score.rules.append(consequence)
+
+        # Keep the per-rule hit counts around for diagnostics, and warn
+        # about rules that never applied to an action item.
+        self._rule_hits = hits
+        for i, rule in enumerate(self.rules):
+            if not hits[i]:
+                log.debug("Irrelevant rule: %s", rule.consequence)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+#
+# This is free and unencumbered software released into the public domain.
+# See the UNLICENSE file for details.
+#
+# ------------------------------------------------------------------------
+# _json.py
+# ------------------------------------------------------------------------
+
+"""
+JSON encoding/decoding helpers.
+
+Prefers orjson when available -- it encodes and decodes several times
+faster than the standard library and works directly in bytes -- and
+falls back to the stdlib json module otherwise.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """
+    Decode a JSON document from a str or bytes value.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def dumps(obj, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Encode a value as JSON bytes, ready to write in binary mode.
+    """
+    if orjson is not None:
+        option = 0
+        if indent: option |= orjson.OPT_INDENT_2
+        if sort_keys: option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+    return json.dumps(
+        obj, indent=2 if indent else None, sort_keys=sort_keys
+    ).encode("utf-8")
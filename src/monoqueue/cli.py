@@ -11,6 +11,7 @@
 The monoqueue command line tool.
 """
 
+import re
 import sys
 from pprint import pprint
 
@@ -23,10 +24,14 @@ def cmd_info(*args):
         log.error("Please specify at least one term to match.")
         return 3
 
+    # One alternation matched per URL, rather than one substring
+    # search per term per URL.
+    pattern = re.compile("|".join(re.escape(arg) for arg in args))
+
     mq = Monoqueue()
     mq.load()
     for url in mq.urls(active_only=False):
-        if any(arg for arg in args if arg in url):
+        if pattern.search(url):
             metadata = mq.metadata(url)
             impact = mq.impact(url)
             item = mq.item(url)
@@ -56,10 +61,8 @@ def cmd_ls(*args):
 
     mq = Monoqueue()
     mq.load()
-    urls = mq.urls()
 
-    for i, url in enumerate(urls):
-        if i > 10: break
+    for url in mq.top_urls(11):
         item = mq.item(url)
         impact = mq.impact(url)
         print(f"[{impact.value}] -- {url} -- {item['title']}")
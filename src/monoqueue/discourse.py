@@ -23,11 +23,12 @@ curl -i -sS -X GET -G https://forum.image.sc/search.json \
   -H "Api-Username: ctrueden" | tee image-sc-forum-search-page-2.json
 """
 
-import json
 import time
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
+from . import _json
 from .log import log
 
 
@@ -39,19 +40,20 @@ def update(mq, config):
 
     search = DiscourseSearch(baseurl=baseurl, username=username, key=key)
     search._progress = mq.progress
+    if "delay" in config:
+        search._delay_per_request = float(config["delay"])
     search.download(query)
 
+    items = {}
     for topic in search.topics:
         url = f"{baseurl}/t/{topic['id']}"
-        if url not in mq.items:
-            mq.items[url] = {}
-
-        mq.items[url].update({
+        items.setdefault(url, {}).update({
             "title": topic["title"],
             "created": topic["created_at"],
             "updated": topic["last_posted_at"],
             "topic": topic
         })
+    return items
 
 
 class DiscourseSearch:
@@ -60,6 +62,16 @@ class DiscourseSearch:
         self._baseurl = baseurl
         self._username = username
         self._key = key
+        # One session for all pages: reuses the pooled TLS connection
+        # (a full handshake per page otherwise) and carries the auth
+        # headers, with retries for transient server errors.
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = "monoqueue"
+        if key: self._session.headers["Api-Key"] = f"{key}"
+        if username: self._session.headers["Api-Username"] = f"{username}"
+        self._session.mount("https://", HTTPAdapter(
+            max_retries=Retry(total=3, backoff_factor=0.5),
+        ))
         self.topics = [] if items is None else items
         self._delay_per_request = 4
         self._max_requests = 100
@@ -69,16 +81,16 @@ class DiscourseSearch:
         """
         Load search data from the given JSON file.
         """
-        with open(filepath) as f:
-            result = json.loads(f.read())
+        with open(filepath, "rb") as f:
+            result = _json.loads(f.read())
             self.topics.update(result)
 
     def save(self, filepath):
         """
         Save search data to the given JSON file.
         """
-        with open(filepath, 'w') as f:
-            return json.dump(self.topics, f, sort_keys=True, indent=4)
+        with open(filepath, "wb") as f:
+            return f.write(_json.dumps(self.topics, indent=True, sort_keys=True))
 
     def download(self, query: str):
         """
@@ -94,15 +106,14 @@ class DiscourseSearch:
             time.sleep(self._delay_per_request)
 
     def _download_page(self, url: str, query: str, page: int):
-        headers = {'User-Agent': 'monoqueue'}
-        if self._key: headers['Api-Key'] = f"{self._key}"
-        if self._username: headers['Api-Username'] = f"{self._username}"
-
         log.debug("Downloading %s page %d", url, page)
         params = {"q": query, "page": page}
-        response = requests.get(url, params=params, headers=headers)
+        response = self._session.get(url, params=params)
         response.raise_for_status()
-        result = response.json()
+        # NB: Parse the raw bytes; under orjson this skips both the
+        # stdlib decoder and the intermediate str that response.json()
+        # would produce.
+        result = _json.loads(response.content)
         if "topics" in result:
             self.topics.extend(result['topics'])
 
@@ -11,29 +11,55 @@
 Routines to extract information from Firefox's places.sqlite database.
 """
 
-import os
-import shutil
 import sqlite3
 import sys
-import tempfile
 from pathlib import Path
 
-from . import time
 from .log import log
 
 
 def update(mq, config):
+    items = {}
     for bookmark in bookmarks(config["folder"]):
         url = bookmark["url"]
-        if url not in mq.items:
-            mq.items[url] = {}
-
-        mq.items[url].update({
+        items.setdefault(url, {}).update({
             "title": bookmark["title"],
             "created": bookmark["dateAdded"],
             "updated": bookmark["lastModified"],
             "bookmark": bookmark
         })
+    return items
+
+
+def _connect(db):
+    """
+    Open the given places.sqlite database for reading.
+
+    Opening with immutable=1 treats the file as a read-only snapshot and
+    skips locking entirely, so it works even while Firefox has the
+    database open -- and avoids copying the whole file. If that fails,
+    fall back to snapshotting the database into memory via SQLite's
+    backup API, which streams pages under SQLite's own locking rather
+    than copying the file byte-for-byte through a temp file.
+
+    :return:
+        A sqlite3.Connection for reading the database.
+    """
+    try:
+        cx = sqlite3.connect(f"file:{db}?mode=ro&immutable=1", uri=True)
+        # Force an actual read, so open failures surface here.
+        cx.execute("select 1 from moz_bookmarks limit 1")
+        return cx
+    except sqlite3.OperationalError:
+        log.debug("Immutable open failed for %s; snapshotting", db)
+
+    src = sqlite3.connect(db)
+    try:
+        cx = sqlite3.connect(":memory:")
+        src.backup(cx)
+    finally:
+        src.close()
+    return cx
 
 
 def bookmarks(folder_name=None):
@@ -44,62 +70,58 @@ def bookmarks(folder_name=None):
         "~/snap/firefox/common/.mozilla/firefox",
     ]
     places_dbs = []
+    # Check the log level once, not per directory; isEnabledFor walks
+    # the logger hierarchy on every call.
+    debug = log.is_debug()
     for config_dir in config_dirs:
-        sqlite_db_files = Path(config_dir).expanduser().glob("*/places.sqlite")
-        if log.is_debug():
+        sqlite_db_files = list(Path(config_dir).expanduser().glob("*/places.sqlite"))
+        if debug:
             for db_file in sqlite_db_files:
-                log.debug(f"Found Firefox sqlite DB: {db_file}")
+                log.debug("Found Firefox sqlite DB: %s", db_file)
         places_dbs.extend(sqlite_db_files)
 
     if len(places_dbs) == 0:
         log.warning("No Firefox sqlite DBs found!")
         return results
 
-    tf = tempfile.NamedTemporaryFile(delete=False, prefix="firefox", suffix=".sqlite")
-    temp_db_path = tf.name
-    tf.close()
-
     for db in places_dbs:
-        # NB: make a copy to avoid locked DB in case Firefox is open.
-        shutil.copyfile(db, temp_db_path)
-
-        cx = sqlite3.connect(temp_db_path)
-
-        folder_clause = ""
-        if folder_name is not None:
-            folder_ids = cx.execute(f"""
-                select id from moz_bookmarks
-                where type = 2 and title = \"{folder_name}\";
-                """)
-
-            ids = ", ".join(str(folder_id) for folder_id, in folder_ids)
-            if len(ids) == 0:
-                continue
-
-            folder_clause = f"and b.parent in ({ids})"
-
-        items = cx.execute(f"""
-            select b.title, h.url, b.dateAdded, b.lastModified
-            from moz_bookmarks b, moz_places h
-            where b.fk = h.id
-            {folder_clause};
-            """)
+        cx = _connect(db)
+        # C-level rows keyed by column alias; dict(row) below then
+        # builds each bookmark record without per-field Python code.
+        cx.row_factory = sqlite3.Row
+        cx.execute("PRAGMA query_only=1")
+        # Read-side tuning: keep temp structures and a generous page
+        # cache in memory, and mmap the file so scans skip read() calls.
+        cx.execute("PRAGMA temp_store=MEMORY")
+        cx.execute("PRAGMA cache_size=-20000")
+        cx.execute("PRAGMA mmap_size=268435456")
+
+        # NB: One fixed, parameterized statement, with the folder filter
+        # folded in as a self-join. SQLite caches the prepared statement
+        # by SQL text, so every call reuses the same plan, and a null
+        # folder_name short-circuits the title check.
+        # NB: Timestamps are formatted by SQLite itself; strftime over
+        # the microsecond-valued columns runs in C per row, where the
+        # old time.string path cost a datetime round trip per row.
+        items = cx.execute("""
+            select b.title as title, h.url as url,
+                strftime('%Y-%m-%dT%H:%M:%SZ', b.dateAdded / 1000000, 'unixepoch')
+                    as dateAdded,
+                strftime('%Y-%m-%dT%H:%M:%SZ', b.lastModified / 1000000, 'unixepoch')
+                    as lastModified
+            from moz_bookmarks b
+            join moz_places h on b.fk = h.id
+            join moz_bookmarks p on b.parent = p.id
+            where p.type = 2 and (? is null or p.title = ?);
+            """, (folder_name, folder_name))
 
         # TODO: recently deleted bookmarks are still on the list, even after quitting Firefox?
         # Test this more, and/or read. What is the separate recently deleted bookmarks table for?
 
-        for title, url, date_added, last_modified in items:
-            results.append({
-                "title": title,
-                "url": url,
-                "dateAdded": time.string(date_added // 1000000),
-                "lastModified": time.string(last_modified // 1000000),
-            })
+        results.extend(dict(row) for row in items.fetchall())
 
         cx.close()
 
-    os.remove(temp_db_path)
-
     return results
 
 
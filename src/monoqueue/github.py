@@ -11,11 +11,12 @@
 Routines to download and organize information from GitHub.
 """
 
-import json
 import time
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
+from . import _json
 from .log import log
 
 
@@ -27,17 +28,16 @@ def update(mq, config):
     ghi._progress = mq.progress
     ghi.download(query)
 
+    items = {}
     for issue in ghi.issues:
         url = issue["html_url"]
-        if url not in mq.items:
-            mq.items[url] = {}
-
-        mq.items[url].update({
+        items.setdefault(url, {}).update({
             "title": issue["title"],
             "created": issue["created_at"],
             "updated": issue["updated_at"],
             "issue": issue
         })
+    return items
 
 
 class GitHubIssues:
@@ -48,6 +48,15 @@ class GitHubIssues:
 
     def __init__(self, items=None, token=None):
         self._token = token
+        # One session for all pages: reuses the pooled TLS connection
+        # (a full handshake per page otherwise) and carries the auth
+        # headers, with retries for transient server errors.
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = "monoqueue"
+        if token: self._session.headers["Authorization"] = f"token {token}"
+        self._session.mount("https://", HTTPAdapter(
+            max_retries=Retry(total=3, backoff_factor=0.5),
+        ))
         self.issues = [] if items is None else items
         self._delay_per_request = 7
         self._max_requests = 100
@@ -57,16 +66,16 @@ class GitHubIssues:
         """
         Load issues from the given JSON file.
         """
-        with open(filepath) as f:
-            result = json.loads(f.read())
+        with open(filepath, "rb") as f:
+            result = _json.loads(f.read())
             self.issues.extend(result)
 
     def save(self, filepath):
         """
         Save issues to the given JSON file.
         """
-        with open(filepath, 'w') as f:
-            return json.dump(self.issues, f, sort_keys=True, indent=4)
+        with open(filepath, "wb") as f:
+            return f.write(_json.dumps(self.issues, indent=True, sort_keys=True))
 
     def download(self, query):
         """
@@ -74,23 +83,35 @@ class GitHubIssues:
         """
         url = GitHubIssues._search_url(query)
         for _ in range(self._max_requests):
-            url = self._download_page(url, query)
+            url, delay = self._download_page(url, query)
             if self._progress: self._progress(url)
             if not url: break
-            time.sleep(self._delay_per_request)
+            time.sleep(delay)
 
     def _download_page(self, url, query):
-        headers = {'User-Agent': 'monoqueue'}
-        if self._token: headers['Authorization'] = f"token {self._token}"
-
         log.debug("Downloading %s", url)
-        response = requests.get(url, headers=headers)
+        response = self._session.get(url)
         response.raise_for_status()
-        result = response.json()
+        # NB: Parse the raw bytes; under orjson this skips both the
+        # stdlib decoder and the intermediate str that response.json()
+        # would produce.
+        result = _json.loads(response.content)
         self.issues.extend(result['items'])
 
         next_url = response.links['next']['url'] if 'next' in response.links else None
         if not next_url and result['total_count'] > 1000 and len(result['items']) > 0:
             # We hit the 1000-issue limit. Continue the search just beyond the last issue we got.
             next_url = GitHubIssues._search_url(f"{query}+created:>{result['items'][-1]['created_at']}")
-        return next_url
+
+        # Pace requests across the current rate limit window, rather
+        # than sleeping a fixed interval regardless of quota: faster
+        # when quota is plentiful, slower when it is nearly drained,
+        # and waiting out the window entirely when it is exhausted.
+        delay = self._delay_per_request
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining and reset:
+            window = max(0.0, int(reset) - time.time())
+            remaining = int(remaining)
+            delay = window if remaining == 0 else window / remaining
+        return next_url, delay
@@ -49,18 +49,22 @@ are available, but arbitrary function calls are notably *not* possible.
 """
 
 import ast
+import operator
 
 from functools import cache
-from typing import Any
+from typing import Any, Callable
 
 
 def dictlike(data: Any) -> bool:
-    return hasattr(data, "get")
+    # NB: Action item data comes from JSON, so concrete type checks
+    # suffice -- and isinstance is much cheaper than hasattr probes.
+    return isinstance(data, dict)
 
 
 def listlike(data: Any) -> bool:
-    # Meh, iterable is close enough. ;-)
-    return hasattr(data, "__iter__")
+    # NB: Deliberately excludes str, which is iterable but should never
+    # be dug into character by character.
+    return isinstance(data, (list, tuple, set, frozenset))
 
 
 def diggable(data: Any):
@@ -72,12 +76,225 @@ def tree(expr: str):
     return ast.parse(expr, mode="eval").body
 
 
+def _none_guard(fn: Callable) -> Callable:
+    return lambda l, r: None if l is None or r is None else fn(l, r)
+
+
+def _false_guard(fn: Callable) -> Callable:
+    return lambda l, r: False if l is None or r is None else fn(l, r)
+
+
+# Binary operator implementations, keyed on AST operator type, with the
+# same None-tolerant semantics as the binary() function below: arithmetic
+# on a missing field yields None, ordered comparisons yield False, and
+# (not) in treats a missing container as empty.
+_BINARY_OPS = {
+    ast.Add: _none_guard(operator.add),
+    ast.Sub: _none_guard(operator.sub),
+    ast.Mult: _none_guard(operator.mul),
+    ast.MatMult: _none_guard(operator.matmul),
+    ast.Div: _none_guard(operator.truediv),
+    ast.Mod: _none_guard(operator.mod),
+    ast.Pow: _none_guard(operator.pow),
+    ast.LShift: _none_guard(operator.lshift),
+    ast.RShift: _none_guard(operator.rshift),
+    ast.BitOr: _none_guard(operator.or_),
+    ast.BitXor: _none_guard(operator.xor),
+    ast.BitAnd: _none_guard(operator.and_),
+    ast.FloorDiv: _none_guard(operator.floordiv),
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: _false_guard(operator.lt),
+    ast.LtE: _false_guard(operator.le),
+    ast.Gt: _false_guard(operator.gt),
+    ast.GtE: _false_guard(operator.ge),
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda l, r: False if r is None else (l in r),
+    ast.NotIn: lambda l, r: True if r is None else (l not in r),
+    ast.And: lambda l, r: l and r,
+    ast.Or: lambda l, r: l or r,
+}
+
+_UNARY_OPS = {
+    ast.Invert: operator.invert,
+    ast.Not: operator.not_,
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _compile_node(expr: str, node: ast.AST) -> Callable[[Any], Any]:
+    """
+    Compile one AST node into a closure over its compiled children.
+
+    This trades the per-evaluation isinstance dispatch of evaluate() for
+    a one-time walk at compile time: the returned closures know exactly
+    what to do and simply call each other.
+    """
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda data: value
+
+    if isinstance(node, ast.Tuple):
+        fns = [_compile_node(expr, elt) for elt in node.elts]
+        return lambda data: (fn(data) for fn in fns)
+
+    if isinstance(node, ast.List):
+        fns = [_compile_node(expr, elt) for elt in node.elts]
+        return lambda data: [fn(data) for fn in fns]
+
+    if isinstance(node, ast.Set):
+        fns = [_compile_node(expr, elt) for elt in node.elts]
+        return lambda data: {fn(data) for fn in fns}
+
+    if isinstance(node, ast.Dict):
+        fns = [
+            (_compile_node(expr, k), _compile_node(expr, v))
+            for k, v in zip(node.keys, node.values)
+        ]
+        return lambda data: {kfn(data): vfn(data) for kfn, vfn in fns}
+
+    if isinstance(node, ast.IfExp):
+        test = _compile_node(expr, node.test)
+        body = _compile_node(expr, node.body)
+        orelse = _compile_node(expr, node.orelse)
+        return lambda data: body(data) if test(data) else orelse(data)
+
+    if isinstance(node, ast.Compare):
+        left = _compile_node(expr, node.left)
+        pairs = [
+            (_BINARY_OPS[type(op)], _compile_node(expr, cmp))
+            for op, cmp in zip(node.ops, node.comparators)
+        ]
+        def compare(data):
+            value = left(data)
+            for opfn, rfn in pairs:
+                value = opfn(value, rfn(data))
+            return value
+        return compare
+
+    if isinstance(node, ast.BoolOp):
+        fns = [_compile_node(expr, value) for value in node.values]
+        # Short-circuit like Python: and stops at the first falsy value,
+        # or at the first truthy one, skipping any remaining operands.
+        stop_when = bool(isinstance(node.op, ast.Or))
+        def boolop(data):
+            value = fns[0](data)
+            for fn in fns[1:]:
+                if bool(value) == stop_when:
+                    return value
+                value = fn(data)
+            return value
+        return boolop
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        def dig(data):
+            if data is None:
+                return None
+            if dictlike(data):
+                return data.get(name)
+            if listlike(data):
+                # NB: Inline the overwhelmingly common element shape
+                # (a dict, e.g. assignees/login) so mapping over a list
+                # costs one dict.get per element instead of a full
+                # recursive dispatch.
+                return [
+                    el.get(name) if type(el) is dict else dig(el)
+                    for el in data
+                ]
+            raise ValueError(f"Weird data type: {type(data)}")
+        return dig
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(expr, node.operand)
+        opfn = _UNARY_OPS[type(node.op)]
+        return lambda data: opfn(operand(data))
+
+    if isinstance(node, ast.BinOp):
+        left = _compile_node(expr, node.left)
+        right = _compile_node(expr, node.right)
+        opfn = _BINARY_OPS[type(node.op)]
+        if isinstance(node.op, ast.Div) and isinstance(node.right, ast.Name):
+            # NB: Right-side of div operation digs into left-side data
+            # structure when that structure is diggable -- see binary().
+            def divdig(data):
+                lvalue = left(data)
+                if diggable(lvalue):
+                    return right(lvalue)
+                return opfn(lvalue, right(data))
+            return divdig
+        return lambda data: opfn(left(data), right(data))
+
+    if isinstance(node, ast.Call):
+        raise TypeError(f"Unsupported function call: {node.func.id}")
+
+    raise TypeError(f"Unsupported {type(node)} expression: {ast.get_source_segment(expr, node)}")
+
+
+@cache
+def compile_expr(expr: str) -> Callable[[Any], Any]:
+    """
+    Compile an expression into a callable that evaluates it against data.
+
+    The expression is parsed and its AST walked exactly once, producing
+    a tree of closures; the returned callable can then be invoked
+    repeatedly (e.g. once per action item) with no per-call parsing or
+    node dispatch.
+    """
+    return _compile_node(expr, tree(expr))
+
+
+def names(expr: str) -> frozenset:
+    """
+    Get the top-level data fields the given expression references.
+
+    An item lacking all of these fields cannot satisfy the expression,
+    so callers can skip evaluating it against such items. The empty set
+    is returned when no such guarantee can be made: either the
+    expression references no fields at all, or it is truthy even with
+    every field absent (e.g. negations, == None, or True-ish constants
+    in boolean chains).
+    """
+    root = tree(expr)
+
+    # Names on the right side of a div dig into the left side's data
+    # structure, so only the remaining names index the item itself.
+    dug = set()
+    for node in ast.walk(root):
+        if (
+            isinstance(node, ast.BinOp) and
+            isinstance(node.op, ast.Div) and
+            isinstance(node.right, ast.Name)
+        ):
+            dug.add(node.right)
+
+    fields = frozenset(
+        node.id for node in ast.walk(root)
+        if isinstance(node, ast.Name) and node not in dug
+    )
+    if not fields:
+        return frozenset()
+
+    # When none of the fields are present, every name digs to None, so
+    # the expression evaluates exactly as it does against empty data.
+    # If that is truthy, absent fields are no grounds for skipping.
+    try:
+        if compile_expr(expr)({}):
+            return frozenset()
+    except Exception:
+        return frozenset()
+
+    return fields
+
+
 def unary(data: Any, expr: str, operand: ast.AST, op: ast.UnaryOp):
     value = evaluate(expr, data, operand)
-    if isinstance(op, ast.Invert): return ~value
-    if isinstance(op, ast.Not): return not value
-    if isinstance(op, ast.UAdd): return +value
-    if isinstance(op, ast.USub): return -value
+    opfn = _UNARY_OPS.get(type(op))
+    if opfn is None:
+        raise ValueError(f"Unsupported operation: {type(op)}")
+    return opfn(value)
 
 
 def binary(expr: str, data: Any, lvalue: Any, op: ast.BinOp, right: ast.AST):
@@ -87,48 +304,19 @@ def binary(expr: str, data: Any, lvalue: Any, op: ast.BinOp, right: ast.AST):
         # because data is a dict, and data['issue'] is also a dict.
         return evaluate(expr, lvalue, right)
 
-    # Other operations evaluate normally (i.e. compute both halves first).
+    # Other operations evaluate normally (i.e. compute both halves first),
+    # dispatching on the operator type via the shared table.
     rvalue = evaluate(expr, data, right)
-
-    none = lvalue is None or rvalue is None
-
-    # Evaluate binary ops (ast.operator) normally.
-    if isinstance(op, ast.Add): return None if none else (lvalue + rvalue)
-    if isinstance(op, ast.Sub): return None if none else (lvalue - rvalue)
-    if isinstance(op, ast.Mult): return None if none else (lvalue * rvalue)
-    if isinstance(op, ast.MatMult): return None if none else (lvalue @ rvalue)
-    if isinstance(op, ast.Div): return None if none else (lvalue / rvalue)
-    if isinstance(op, ast.Mod): return None if none else (lvalue % rvalue)
-    if isinstance(op, ast.Pow): return None if none else (lvalue ** rvalue)
-    if isinstance(op, ast.LShift): return None if none else (lvalue << rvalue)
-    if isinstance(op, ast.RShift): return None if none else (lvalue >> rvalue)
-    if isinstance(op, ast.BitOr): return None if none else (lvalue | rvalue)
-    if isinstance(op, ast.BitXor): return None if none else (lvalue ^ rvalue)
-    if isinstance(op, ast.BitAnd): return None if none else (lvalue & rvalue)
-    if isinstance(op, ast.FloorDiv): return None if none else (lvalue // rvalue)
-
-    # Evaluate comparison ops (ast.cmpop) normally.
-    if isinstance(op, ast.Eq): return lvalue == rvalue
-    if isinstance(op, ast.NotEq): return lvalue != rvalue
-    if isinstance(op, ast.Lt): return False if none else (lvalue < rvalue)
-    if isinstance(op, ast.LtE): return False if none else (lvalue <= rvalue)
-    if isinstance(op, ast.Gt): return False if none else (lvalue > rvalue)
-    if isinstance(op, ast.GtE): return False if none else (lvalue >= rvalue)
-    if isinstance(op, ast.Is): return lvalue is rvalue
-    if isinstance(op, ast.IsNot): return lvalue is not rvalue
-    if isinstance(op, ast.In): return False if rvalue is None else (lvalue in rvalue)
-    if isinstance(op, ast.NotIn): return True if rvalue is None else (lvalue not in rvalue)
-
-    # Evaluate boolean ops (ast.boolop) normally.
-    if isinstance(op, ast.And): return lvalue and rvalue
-    if isinstance(op, ast.Or): return lvalue or rvalue
-
-    raise ValueError(f"Unsupported operation: {type(op)}")
+    opfn = _BINARY_OPS.get(type(op))
+    if opfn is None:
+        raise ValueError(f"Unsupported operation: {type(op)}")
+    return opfn(lvalue, rvalue)
 
 
 def evaluate(expr: str, data: Any, node: Any = None):
     if node is None:
-        return evaluate(expr, data, tree(expr))
+        # Entry point: defer to the compiled (and cached) closure.
+        return compile_expr(expr)(data)
 
     if not isinstance(node, ast.AST):
         return node
@@ -171,10 +359,14 @@ def evaluate(expr: str, data: Any, node: Any = None):
         return value
 
     if isinstance(node, ast.BoolOp):
-        # NB: No short-circuiting for now.
+        # Short-circuit like Python does: skip remaining operands once
+        # the result is decided.
+        stop_when = bool(isinstance(node.op, ast.Or))
         lvalue = evaluate(expr, data, node.values[0])
         for value in node.values[1:]:
-            lvalue = binary(expr, data, lvalue, node.op, value)
+            if bool(lvalue) == stop_when:
+                return lvalue
+            lvalue = evaluate(expr, data, value)
         return lvalue
 
     if isinstance(node, ast.Name):
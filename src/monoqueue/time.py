@@ -12,9 +12,14 @@ Utility functions for working with dates and times.
 """
 
 import datetime
+import functools
 import re
 from typing import Union
 
+# Timestamp patterns, compiled once rather than per str2dt call.
+_RE_GITHUB_TS = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z$")
+_RE_DISCOURSE_TS = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$")
+
 
 def now() -> datetime.datetime:
     """
@@ -25,20 +30,33 @@ def now() -> datetime.datetime:
     return datetime.datetime.now(tz=datetime.timezone.utc)
 
 
+@functools.lru_cache(maxsize=4096)
 def str2dt(timestamp: str) -> datetime.datetime:
     """
     Parse a string to a datetime object.
+
+    Results are memoized: the same timestamp strings recur across
+    scoring passes and active-item checks, and strptime is costly.
     :param timestamp:
         String representation of a timestamp in
         YYYY-MM-DDTHH:MM:SSZ or YYYY-MM-DDTHH:MM:SS.sssZ format.
     :return:
         Parsed datetime.datetime object of the timestamp.
     """
+    # Fast path: fromisoformat parses ISO 8601 several times faster
+    # than strptime. Rewrite the trailing Z as an explicit UTC offset,
+    # which every supported Python version accepts.
+    if timestamp.endswith("Z"):
+        try:
+            return datetime.datetime.fromisoformat(timestamp[:-1] + "+00:00")
+        except ValueError:
+            pass  # Fall through to the strptime paths below.
+
     # Credit: https://stackoverflow.com/a/969324/1207769
-    if re.match("\\d{4}-\\d{2}-\\d{2}T\\d{2}:\\d{2}:\\d{2}\\.\\d+Z$", timestamp):
+    if _RE_GITHUB_TS.match(timestamp):
         # GitHub style, without millisecond.
         return datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f%z")
-    if re.match("\\d{4}-\\d{2}-\\d{2}T\\d{2}:\\d{2}:\\d{2}Z$", timestamp):
+    if _RE_DISCOURSE_TS.match(timestamp):
         # Discourse style, with millisecond.
         return datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S%z")
     raise ValueError(f"Weird timestamp: {timestamp}")
@@ -54,7 +72,11 @@ def string(timestamp: Union[datetime.datetime, int]) -> str:
         Timestamp string in ISO 8601 format.
     """
     if isinstance(timestamp, int):
-        timestamp = datetime.datetime.fromtimestamp(timestamp)
+        # Format directly: skips the isoformat + offset-trimming dance
+        # below, and pins the rendering to UTC so the Z suffix is true.
+        return datetime.datetime.fromtimestamp(
+            timestamp, tz=datetime.timezone.utc
+        ).strftime("%Y-%m-%dT%H:%M:%SZ")
     if not hasattr(timestamp, "isoformat"):
         raise ValueError(f"Invalid timestamp type: {type(timestamp)}")
     s: str = timestamp.isoformat()
@@ -12,11 +12,14 @@ A curses-based user interface to monoqueue.
 """
 
 import curses
+import functools
 import re
 import sys
+import threading
 import webbrowser
 
 from . import Monoqueue, time
+from .log import log
 
 # A nice curses tutorial can be found at:
 # https://docs.python.org/3/howto/curses.html#curses-howto
@@ -31,18 +34,13 @@ C_TITLE = 4
 C_DATES = 5
 C_SCORE = 6
 
-K_UP = (75, 69, 89, 95, 85, 80)
-K_DN = (75, 69, 89, 95, 68, 79, 87, 78)
-K_LT = (75, 69, 89, 95, 76, 69, 70, 84)
-K_RT = (75, 69, 89, 95, 82, 73, 71, 72, 84)
-K_PGUP = (75, 69, 89, 95, 80, 80, 65, 71, 69)
-K_PGDN = (75, 69, 89, 95, 78, 80, 65, 71, 69)
-K_HOME = (75, 69, 89, 95, 72, 79, 77, 69)
-K_END = (75, 69, 89, 95, 69, 78, 68)
-K_CTRL_B = (2,)
-K_CTRL_D = (4,)
-K_CTRL_F = (6,)
-K_CTRL_U = (21,)
+K_CTRL_B = "\x02"
+K_CTRL_D = "\x04"
+K_CTRL_F = "\x06"
+K_CTRL_U = "\x15"
+
+_OPTION_LINE = "(O)pen | (N)ext | (P)revious | Defer (1)(2)(3)... | (Q)uit"
+_OPTION_RE = re.compile(r"(\([A-Z0-9]\))")
 
 class UI:
     def __init__(self, stdscr):
@@ -53,20 +51,45 @@ class UI:
         self.index = None
         self.count = None
         self.scroll_offset = None
+        # Tokenize the option line once; odd tokens are the (K) keys.
+        self._option_tokens = _OPTION_RE.split(_OPTION_LINE)
+        self._divider = ""
+        # Wrapped body lines, keyed on (url, COLS) so that scrolling
+        # does not re-wrap the text, but resizing does.
+        self._wrap_cache = {}
+        # Formatted "* rule" lines for the score column, keyed on url;
+        # an item's matched rules never change within a session.
+        self._rule_lines = {}
+        # Rendered age line per url, refreshed once a minute; the
+        # displayed resolution does not warrant recomputing per frame.
+        self._age_cache = {}
+        # Color attributes by pair number; loop() fills these in once
+        # the color pairs exist. Zeros (no attributes) until then.
+        self._attrs = [0] * 7
+        # Background saver, so deferring an item does not stall the
+        # next redraw on JSON serialization and disk I/O. Bursts of
+        # deferrals coalesce into a single save via the dirty flag.
+        self._mq_lock = threading.Lock()
+        self._save_pending = threading.Event()
+        self._save_dirty = False
+        self._save_stop = False
+        self._saver = threading.Thread(target=self._save_worker, daemon=True)
+        self._saver.start()
         self.jump(0)
 
-    def refresh(self):
-        self.stdscr.refresh()
-
     def draw_screen(self):
-        self.stdscr.clear()
+        # NB: erase, not clear -- clear forces curses to retransmit the
+        # entire screen, while erase blanks the virtual screen and lets
+        # curses diff it against the physical one, emitting escape
+        # sequences only for cells that actually changed.
+        self.stdscr.erase()
 
         item = self.mq.item(self.url)
         created = item["created"]
         updated = item["updated"]
         impact = self.mq.impact(self.url)
         issue = item.get("issue")
-        body = UI.split_lines(issue.get("body"), 0) if issue else None
+        body = self.wrapped_body(issue) if issue else None
 
         row = -1
         self.write(self.url, (row := row + 1), c=C_URL)
@@ -75,7 +98,7 @@ class UI:
         self.draw_divider(row := row + 1)
         self.write(f"Action item {self.index + 1} of {self.count}", (row := row + 1), 0)
         self.write("", (row := row + 1), 0)
-        self.draw_option_line("(O)pen | (N)ext | (P)revious | Defer (1)(2)(3)... | (Q)uit")
+        self.draw_option_line()
         prompt_row = (row := row + 1)
         self.draw_divider(row := row + 1)
 
@@ -84,14 +107,18 @@ class UI:
         l_col = 2
         self.write(f"Created: {created}", (l_row := l_row + 1), l_col, c=C_DATES)
         self.write(f"Updated: {updated}", (l_row := l_row + 1), l_col, c=C_DATES)
-        self.write(f"Age: {time.age(updated)}", (l_row := l_row + 1), l_col, c=C_DATES)
+        self.write(self.age_line(updated), (l_row := l_row + 1), l_col, c=C_DATES)
 
         # Right column
         r_row = row
         r_col = 40
         self.write(f"Impact: {impact.value}", (r_row := r_row + 1), r_col, c=C_SCORE)
-        for rule in impact.rules:
-            self.write(f"* {rule}", (r_row := r_row + 1), r_col, c=C_SCORE)
+        rule_lines = self._rule_lines.get(self.url)
+        if rule_lines is None:
+            rule_lines = self._rule_lines[self.url] = \
+                [f"* {rule}" for rule in impact.rules]
+        for line in rule_lines:
+            self.write(line, (r_row := r_row + 1), r_col, c=C_SCORE)
 
         # Body, if available
         row = max(l_row, r_row)
@@ -100,24 +127,59 @@ class UI:
         if body:
             max_offset = len(body) - curses.LINES + row + 1
             self.scroll_offset = max(0, min(self.scroll_offset, max_offset))
-            for i in range(self.scroll_offset, len(body)):
-                self.write(body[i], (row := row + 1), 0)
-                if row >= curses.LINES: break
+            # Slice out only the visible lines; no per-line bounds check.
+            visible = body[self.scroll_offset:
+                           self.scroll_offset + curses.LINES - row - 1]
+            # Body lines are already wrapped to width, so skip write()
+            # and its truncation: addnstr clips at the C level.
+            addnstr = self.stdscr.addnstr
+            attr = self._attrs[0]
+            width = curses.COLS
+            try:
+                for line in visible:
+                    addnstr((row := row + 1), 0, line, width, attr)
+            except:
+                # See the note about resize races in write() below.
+                pass
 
         # Cursor prompt
         self.write("> ", prompt_row, 0)
 
-    def draw_option_line(self, s):
-        option = False
-        for token in re.split("(\\([A-Z0-9]\\))", s):
-            self.write(token, c=C_OPTION if option else 0)
-            option = not option
+        # Stage the frame; the main loop pushes it with one doupdate.
+        self.stdscr.noutrefresh()
+
+    def age_line(self, updated):
+        minute = int(time.now().timestamp()) // 60
+        cached = self._age_cache.get(self.url)
+        if cached is not None and cached[0] == minute:
+            return cached[1]
+        line = f"Age: {time.age(updated)}"
+        self._age_cache[self.url] = (minute, line)
+        return line
+
+    def wrapped_body(self, issue):
+        key = (self.url, curses.COLS)
+        body = self._wrap_cache.get(key)
+        if body is None:
+            if len(self._wrap_cache) >= 32:
+                self._wrap_cache.clear()
+            body = self._wrap_cache[key] = UI.split_lines(issue.get("body"), 0)
+        return body
+
+    def draw_option_line(self):
+        for i, token in enumerate(self._option_tokens):
+            self.write(token, c=C_OPTION if i & 1 else 0)
 
     def draw_divider(self, y):
-        self.write("-" * curses.COLS, y, 0)
+        if len(self._divider) != curses.COLS:
+            self._divider = "-" * curses.COLS
+        self.write(self._divider, y, 0)
 
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def trunc_line(line, max_len):
+        # Memoized: the same handful of strings (url, title, dates,
+        # option tokens) are re-truncated on every frame.
         if len(line) <= max_len: return line
         end = max_len - 3
         return "" if end < 0 else line[:end] + "..."
@@ -132,32 +194,39 @@ class UI:
 
         max_len = curses.COLS - x
         code = False
-        for line in re.split("\r\n|\n", s.replace("\t", "    ")):
+        append = lines.append
+        # NB: expandtabs and splitlines are single C-level passes,
+        # replacing the replace() + regex split combination -- and
+        # expandtabs honors tab stops rather than pasting four spaces.
+        for line in s.expandtabs(4).splitlines():
             if line.startswith("```"): code = not code
-            tack = True
-            while len(line) > max_len:
-                if code:
-                    # No line splitting inside a code fence.
-                    end = len(line)
-                    tack = False
-                else:
-                    # Split up long lines on words.
-                    end = line[:max_len].rfind(" ")
-                    if end < 0: end = line.find(" ", max_len)
-                    if end < 0: end = len(line)
-
-                lines.append(line[:end])
-                line = line[end + 1:]
-
-            if tack: lines.append(line)
+            if code or len(line) <= max_len:
+                # Short lines -- and code fences -- are kept whole.
+                append(line)
+                continue
+
+            # Wrap long lines at words, walking a start index forward
+            # instead of repeatedly slicing off the wrapped prefix --
+            # the old line[end + 1:] rebuilt the whole remainder per
+            # emitted line, going quadratic on long bodies.
+            n = len(line)
+            start = 0
+            while n - start > max_len:
+                end = line.rfind(" ", start, start + max_len)
+                if end < 0: end = line.find(" ", start + max_len)
+                if end < 0: end = n
+                append(line[start:end])
+                start = end + 1
+            append(line[start:])
 
         return lines
 
     def write(self, msg, y=None, x=None, c=0):
-        s = str(msg)
+        s = msg if type(msg) is str else str(msg)
+        attr = self._attrs[c]
         if y is None:
             # Draw the string at the current cursor position.
-            self.stdscr.addstr(s, curses.color_pair(c))
+            self.stdscr.addstr(s, attr)
             return
 
         if x is None:
@@ -174,36 +243,89 @@ class UI:
 
         s = UI.trunc_line(s, curses.COLS - x)
         try:
-            self.stdscr.addstr(y, x, s, curses.color_pair(c))
+            self.stdscr.addstr(y, x, s, attr)
         except:
             # Every so often, curses crashes while resizing the terminal.
             # Ignoring these errors seems to behave just fine, so we do.
             pass
 
+    def _save_worker(self):
+        while True:
+            self._save_pending.wait()
+            self._save_pending.clear()
+            if self._save_dirty:
+                self._save_dirty = False
+                try:
+                    with self._mq_lock:
+                        # Persist the updated metadata to disk.
+                        self.mq.save(items_path=None)
+                except Exception:
+                    # Keep the flag set so quit() retries synchronously
+                    # rather than silently dropping the deferrals, and
+                    # keep the thread alive for the next attempt.
+                    self._save_dirty = True
+                    log.exception("Background save failed!")
+                    if self._save_stop: break
+                    continue
+            # NB: Re-check the dirty flag before exiting -- a deferral
+            # that slipped in after the check above must still be
+            # flushed, or quit() would drop it.
+            if self._save_stop and not self._save_dirty:
+                break
+
+    def _invalidate_caches(self):
+        self._wrap_cache.clear()
+        self._divider = ""
+        UI.trunc_line.cache_clear()
+
     def quit(self, exit_code=0):
+        # Flush any pending background save before exiting.
+        self._save_stop = True
+        self._save_pending.set()
+        self._saver.join()
+        if self._save_dirty:
+            # The background save failed (or the worker died); retry
+            # synchronously so the error surfaces instead of exiting
+            # cleanly with unsaved deferrals.
+            with self._mq_lock:
+                self.mq.save(items_path=None)
         sys.exit(exit_code)
 
     def readkey(self):
-        key = self.stdscr.getkey()
-        self.write(key)
-        self.refresh()
-        return key
+        return self.stdscr.getkey()
 
-    def do_operation(self, key: str):
-        code = tuple(ord(c) for c in key)
-        if key in "oO": webbrowser.open(self.url)
-        elif key in "nN": self.jump(self.index + 1)
-        elif key in "pP": self.jump(self.index - 1)
-        elif key in "qQ": self.quit()
-        elif key in "123456789": self.defer(ord(key) - ord('0'))
-        elif key in "jJ" or code == K_DN: self.scroll(1)
-        elif key in "kK" or code == K_UP: self.scroll(-1)
-        elif code in (K_PGDN, K_CTRL_D, K_CTRL_F): self.scroll(curses.LINES // 2)
-        elif code in (K_PGUP, K_CTRL_U, K_CTRL_B): self.scroll(-curses.LINES // 2)
-        elif code == K_HOME: self.scroll(-2**30)
-        elif key == "G" or code == K_END: self.scroll(2**30)
+    def open_url(self):
+        webbrowser.open(self.url)
+        return False
+
+    def next_item(self):
+        self.jump(self.index + 1)
+        return True
+
+    def previous_item(self):
+        self.jump(self.index - 1)
         return True
 
+    def defer_days(self, days):
+        self.defer(days)
+        return True
+
+    def resize(self):
+        # Terminal resized: refresh curses.LINES/COLS, drop the
+        # width-dependent caches, and repaint at the new geometry.
+        curses.update_lines_cols()
+        self._invalidate_caches()
+        return True
+
+    def do_operation(self, key: str):
+        """
+        Perform the operation for the given key, if any.
+        :return:
+            True if the operation dirtied the screen, requiring a redraw.
+        """
+        handler = UI._KEY_HANDLERS.get(key)
+        return handler(self) if handler else False
+
     def loop(self):
         curses.init_pair(C_OPTION, curses.COLOR_RED, curses.COLOR_BLACK)
         curses.init_pair(C_HILITE, curses.COLOR_YELLOW, curses.COLOR_BLACK)
@@ -212,30 +334,74 @@ class UI:
         curses.init_pair(C_DATES, curses.COLOR_BLUE, curses.COLOR_BLACK)
         curses.init_pair(C_SCORE, curses.COLOR_MAGENTA, curses.COLOR_BLACK)
 
+        # Resolve each color pair to its attribute bits once, rather
+        # than calling curses.color_pair on every write.
+        self._attrs = [curses.color_pair(i) for i in range(len(self._attrs))]
+
+        # Redraw only when an operation actually changed the screen;
+        # keys with no effect (e.g. scrolling up at the top) cost no
+        # repaint, and getkey still blocks so idling burns no CPU.
+        dirty = True
         while True:
-            self.draw_screen()
+            if dirty:
+                self.draw_screen()
+                curses.doupdate()
             key = self.readkey()
-            self.do_operation(key)
+            dirty = self.do_operation(key)
 
     def jump(self, index):
         urls = self.mq.urls()
         self.count = len(urls)
         self.index = max(0, min(index, self.count - 1))
-        self.url = urls[self.index]
-        self.scroll_offset = 0
+        url = urls[self.index]
+        if url != self.url:
+            # Only landing on a different item resets the scroll;
+            # e.g. a clamped jump past the end stays put.
+            self.url = url
+            self.scroll_offset = 0
 
     def defer(self, days):
-        self.mq.defer(self.url, time.days_later(days))
+        with self._mq_lock:
+            self.mq.defer(self.url, time.days_later(days))
 
-        # Persist the updated metadata to disk.
-        self.mq.save(items_path=None)
+        # Let the background saver persist the updated metadata.
+        self._save_dirty = True
+        self._save_pending.set()
 
         # Refresh the display.
         self.jump(self.index)
 
     def scroll(self, amount):
-        self.scroll_offset += amount
-        if self.scroll_offset < 0: self.scroll_offset = 0
+        offset = max(0, self.scroll_offset + amount)
+        changed = offset != self.scroll_offset
+        self.scroll_offset = offset
+        return changed
+
+    # Key dispatch table, consulted by do_operation with a single dict
+    # lookup per keypress. getkey() returns special keys as plain
+    # strings like "KEY_UP", so those names key the table directly.
+    # Each handler takes the UI and returns whether to redraw.
+    _KEY_HANDLERS = {
+        "KEY_RESIZE": resize,
+        "KEY_HOME": lambda ui: ui.scroll(-2**30),
+        "KEY_END": lambda ui: ui.scroll(2**30),
+        "G": lambda ui: ui.scroll(2**30),
+    }
+    for _key in "oO": _KEY_HANDLERS[_key] = open_url
+    for _key in "nN": _KEY_HANDLERS[_key] = next_item
+    for _key in "pP": _KEY_HANDLERS[_key] = previous_item
+    for _key in "qQ": _KEY_HANDLERS[_key] = quit
+    for _key in "123456789":
+        _KEY_HANDLERS[_key] = lambda ui, days=int(_key): ui.defer_days(days)
+    for _key in ("j", "J", "KEY_DOWN"):
+        _KEY_HANDLERS[_key] = lambda ui: ui.scroll(1)
+    for _key in ("k", "K", "KEY_UP"):
+        _KEY_HANDLERS[_key] = lambda ui: ui.scroll(-1)
+    for _key in ("KEY_NPAGE", K_CTRL_D, K_CTRL_F):
+        _KEY_HANDLERS[_key] = lambda ui: ui.scroll(curses.LINES // 2)
+    for _key in ("KEY_PPAGE", K_CTRL_U, K_CTRL_B):
+        _KEY_HANDLERS[_key] = lambda ui: ui.scroll(-curses.LINES // 2)
+    del _key
 
 def main(*args):
     curses.wrapper(lambda stdscr: UI(stdscr).loop())
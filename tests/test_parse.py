@@ -64,6 +64,27 @@ class TestParse(unittest.TestCase):
         # (True and False) or False -> False or False
         self.assertFalse(parse.evaluate("True and False or False", self.data))
 
+    def test_names(self):
+        self.assertEqual({"outer"}, parse.names("outer/inner/innermost"))
+        self.assertEqual({"people"}, parse.names("'Gallant' in people/name"))
+        self.assertEqual({"greetings", "farewells"}, parse.names("greetings & farewells"))
+        # Expressions that are truthy even with every field absent
+        # offer no absent-field shortcut.
+        self.assertEqual(set(), parse.names("not people"))
+        self.assertEqual(set(), parse.names("'Gallant' not in people/name"))
+        self.assertEqual(set(), parse.names("people == None"))
+        self.assertEqual(set(), parse.names("people or True"))
+        self.assertEqual(set(), parse.names("1 if people else 2"))
+
+    def test_compile_expr(self):
+        fn = parse.compile_expr("'Gallant' in people/name")
+        self.assertTrue(fn(self.data))
+        self.assertFalse(fn({"people": [{"name": "Chuckles"}]}))
+        # Compiled closures are cached per expression.
+        self.assertIs(fn, parse.compile_expr("'Gallant' in people/name"))
+        # Numeric division still works when the left side is not diggable.
+        self.assertEqual(22.0, parse.compile_expr("outer/inner/innermost / 2")(self.data))
+
     def test_slash_access(self):
         self.assertEqual(44, parse.evaluate("outer/inner/innermost", self.data))
         self.assertEqual(["Goofus", "Gallant"], parse.evaluate("people/name", self.data))